@@ -5,8 +5,11 @@ Uses Google Sheets for persistent storage.
 
 import csv
 import io
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
 import gspread
 from google.oauth2.service_account import Credentials
 
@@ -16,6 +19,24 @@ SCOPES = [
     "https://www.googleapis.com/auth/drive",
 ]
 
+# Example data shown when nothing has been saved yet
+DEFAULT_FAMILIES = "Adams:John,Mary,Tom\nOiler:Bob,Sue\nBaker:Ann"
+DEFAULT_STAYS = "John,7\nMary,5\nTom,5\nBob,7\nSue,3\nAnn,7"
+DEFAULT_EXPENSES = "Adams,rent,2100,House rental\nOiler,firewood,150,Firewood\nBaker,food,320,Groceries"
+
+# Fixed text report blocks, built once instead of on every report
+_SEP_EQ = "=" * 50
+_SEP_DASH = "-" * 50
+_HDR_EXPENSE_SUMMARY = f"{_SEP_EQ}\nEXPENSE SUMMARY\n{_SEP_EQ}"
+_HDR_EXPENSE_DETAILS = f"{_SEP_EQ}\nEXPENSE DETAILS (by Family)\n{_SEP_EQ}"
+_HDR_STAY_SUMMARY = f"{_SEP_EQ}\nSTAY SUMMARY (Person-Nights)\n{_SEP_EQ}"
+_HDR_BALANCE_SHEET = f"{_SEP_EQ}\nBALANCE SHEET\n{_SEP_EQ}"
+_HDR_SETTLEMENTS = f"{_SEP_EQ}\nSETTLEMENTS\n{_SEP_EQ}"
+_BALANCE_TABLE_HEADER = (
+    f"  {'Family':<10} {'Nights':>8} {'Owes':>12} {'Paid':>12} {'Balance':>12}\n"
+    + "  " + "-" * 54
+)
+
 
 @st.cache_resource
 def get_gspread_client():
@@ -27,6 +48,7 @@ def get_gspread_client():
     return gspread.authorize(credentials)
 
 
+@st.cache_resource
 def get_worksheet():
     """Get the worksheet for storing data."""
     client = get_gspread_client()
@@ -35,43 +57,93 @@ def get_worksheet():
     return spreadsheet.sheet1
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_saved_data() -> dict:
+    """Fetch saved data from Google Sheets in a single batched request.
+
+    Cached so reruns don't hit the API; errors propagate and are not cached.
+    """
+    worksheet = get_worksheet()
+    # Data stored in cells: A1=families, A2=stays, A3=expenses
+    values = worksheet.batch_get(["A1:A3"])[0]
+    if values and len(values) >= 3:
+        return {
+            'families': values[0][0] if values[0] else "",
+            'stays': values[1][0] if values[1] else "",
+            'expenses': values[2][0] if values[2] else "",
+        }
+    return {}
+
+
 def load_saved_data() -> dict:
     """Load saved data from Google Sheets."""
     try:
-        worksheet = get_worksheet()
-        # Data stored in cells: A1=families, A2=stays, A3=expenses
-        values = worksheet.get("A1:A3")
-        if values and len(values) >= 3:
-            return {
-                'families': values[0][0] if values[0] else "",
-                'stays': values[1][0] if values[1] else "",
-                'expenses': values[2][0] if values[2] else "",
-            }
+        return fetch_saved_data()
     except Exception as e:
         st.warning(f"Could not load data from Google Sheets: {e}")
     return {}
 
 
+@st.cache_resource
+def get_save_executor() -> ThreadPoolExecutor:
+    """Get the background worker used for saves (one worker keeps them in order)."""
+    return ThreadPoolExecutor(max_workers=1)
+
+
+def write_data(worksheet, families: str, stays: str, expenses: str):
+    """Write data to the worksheet. Runs on the save executor."""
+    # Store each data type in a separate row
+    worksheet.batch_update(
+        [{"range": "A1:A3", "values": [[families], [stays], [expenses]]}],
+        value_input_option="RAW",
+    )
+    # Make the next load reflect what was just written
+    fetch_saved_data.clear()
+
+
 def save_data(families: str, stays: str, expenses: str):
-    """Save data to Google Sheets."""
+    """Save data to Google Sheets in the background.
+
+    The outcome is reported on a later rerun by report_save_status.
+    """
+    # Skip the round-trip if nothing changed since the last save
+    data = (families, stays, expenses)
+    if data == st.session_state.get('_last_saved'):
+        return
     try:
         worksheet = get_worksheet()
-        # Store each data type in a separate row
-        worksheet.update("A1:A3", [[families], [stays], [expenses]])
     except Exception as e:
         st.error(f"Could not save data to Google Sheets: {e}")
+        return
+    st.session_state['_save_future'] = get_save_executor().submit(write_data, worksheet, *data)
+    st.session_state['_last_saved'] = data
+
+
+def report_save_status():
+    """Show the result of a finished background save, if there is one."""
+    future = st.session_state.get('_save_future')
+    if future is None or not future.done():
+        return
+    del st.session_state['_save_future']
+    error = future.exception()
+    if error is None:
+        st.toast("Saved to Google Sheets")
+    else:
+        # Allow the same data to be saved again
+        st.session_state.pop('_last_saved', None)
+        st.error(f"Could not save data to Google Sheets: {error}")
 
 
+@st.cache_data(show_spinner=False)
 def parse_families(text: str) -> dict[str, str]:
     """Parse families data and return member_name -> family_name mapping.
     Format: FamilyName:Member1,Member2,Member3
     """
     member_to_family = {}
-    for line in text.strip().split('\n'):
-        line = line.strip()
-        if not line or ':' not in line:
+    for line in text.splitlines():
+        family_name, sep, members_str = line.partition(':')
+        if not sep:
             continue
-        family_name, members_str = line.split(':', 1)
         family_name = family_name.strip()
         for member in members_str.split(','):
             member = member.strip()
@@ -80,76 +152,91 @@ def parse_families(text: str) -> dict[str, str]:
     return member_to_family
 
 
-def parse_stays(text: str) -> list[dict]:
-    """Parse stays data and return list of stay records.
+@st.cache_data(show_spinner=False)
+def parse_stays(text: str) -> dict[str, list]:
+    """Parse stays data and return parallel columns of stay records.
     Format: MemberName,Nights (one per line)
     """
-    stays = []
-    for line in text.strip().split('\n'):
-        line = line.strip()
-        if not line or ',' not in line:
+    members = []
+    nights_col = []
+    for line in text.splitlines():
+        member, sep, rest = line.partition(',')
+        if not sep:
+            continue
+        nights_str = rest.partition(',')[0]
+        try:
+            nights = int(nights_str)
+        except ValueError:
             continue
-        parts = line.split(',')
-        if len(parts) >= 2:
-            member = parts[0].strip()
-            try:
-                nights = int(parts[1].strip())
-                stays.append({'member_name': member, 'nights': nights})
-            except ValueError:
-                continue
-    return stays
-
-
-def parse_expenses(text: str) -> list[dict]:
-    """Parse expenses data and return list of expense records.
+        members.append(member.strip())
+        nights_col.append(nights)
+    return {'member_name': members, 'nights': nights_col}
+
+
+@st.cache_data(show_spinner=False)
+def parse_expenses(text: str) -> dict[str, list]:
+    """Parse expenses data and return parallel columns of expense records.
     Format: Family,Type,Amount,Description (one per line)
     """
-    expenses = []
-    for line in text.strip().split('\n'):
-        line = line.strip()
-        if not line or ',' not in line:
+    families = []
+    types = []
+    amounts = []
+    descriptions = []
+    for line in text.splitlines():
+        parts = line.split(',', 3)
+        if len(parts) < 3:
+            continue
+        try:
+            amount = float(parts[2])
+        except ValueError:
             continue
-        parts = line.split(',')
-        if len(parts) >= 3:
-            try:
-                expenses.append({
-                    'paid_by_family': parts[0].strip(),
-                    'expense_type': parts[1].strip(),
-                    'amount': float(parts[2].strip()),
-                    'description': parts[3].strip() if len(parts) > 3 else '',
-                })
-            except ValueError:
-                continue
-    return expenses
-
-
-def calculate_person_nights(stays: list[dict], member_to_family: dict[str, str]) -> dict[str, int]:
+        families.append(parts[0].strip())
+        types.append(parts[1].strip())
+        amounts.append(amount)
+        descriptions.append(parts[3].strip() if len(parts) > 3 else '')
+    return {
+        'paid_by_family': families,
+        'expense_type': types,
+        'amount': amounts,
+        'description': descriptions,
+    }
+
+
+def calculate_person_nights(stays: dict[str, list], member_to_family: dict[str, str]) -> dict[str, int]:
     """Calculate total person-nights per family."""
     family_nights = defaultdict(int)
-    for stay in stays:
-        member = stay['member_name']
-        nights = stay['nights']
+    for member, nights in zip(stays['member_name'], stays['nights']):
         family = member_to_family[member]
         family_nights[family] += nights
     return dict(family_nights)
 
 
-def calculate_family_payments(expenses: list[dict]) -> dict[str, float]:
+def calculate_family_payments(expenses: dict[str, list]) -> dict[str, float]:
     """Calculate total amount paid by each family."""
     payments = defaultdict(float)
-    for expense in expenses:
-        payments[expense['paid_by_family']] += expense['amount']
+    for family, amount in zip(expenses['paid_by_family'], expenses['amount']):
+        payments[family] += amount
     return dict(payments)
 
 
-def calculate_expense_totals_by_type(expenses: list[dict]) -> dict[str, float]:
+def calculate_expense_totals_by_type(expenses: dict[str, list]) -> dict[str, float]:
     """Calculate total expenses by type."""
     totals = defaultdict(float)
-    for expense in expenses:
-        totals[expense['expense_type']] += expense['amount']
+    for expense_type, amount in zip(expenses['expense_type'], expenses['amount']):
+        totals[expense_type] += amount
     return dict(totals)
 
 
+def group_stays_by_family(stays: dict[str, list], member_to_family: dict[str, str]) -> dict[str, list[tuple[str, int]]]:
+    """Group (member, nights) pairs by family, sorted by family then member."""
+    rows = sorted((member_to_family[member], member, nights)
+                  for member, nights in zip(stays['member_name'], stays['nights']))
+    return {
+        family: [(member, nights) for _, member, nights in group]
+        for family, group in groupby(rows, key=itemgetter(0))
+    }
+
+
 def calculate_settlements(balances: dict[str, float]) -> list[tuple[str, str, float]]:
     """Calculate minimal settlements using greedy matching."""
     debtors = []
@@ -166,109 +253,86 @@ def calculate_settlements(balances: dict[str, float]) -> list[tuple[str, str, fl
 
     settlements = []
 
-    while debtors and creditors:
-        debtor, debt = debtors[0]
-        creditor, credit = creditors[0]
+    # Walk both sorted lists with an index each instead of popping the front
+    i = j = 0
+    while i < len(debtors) and j < len(creditors):
+        debtor, debt = debtors[i]
+        creditor, credit = creditors[j]
 
         amount = min(debt, credit)
         if amount > 0.01:
             settlements.append((debtor, creditor, amount))
 
-        debtors[0][1] -= amount
-        creditors[0][1] -= amount
+        debtors[i][1] -= amount
+        creditors[j][1] -= amount
 
-        if debtors[0][1] < 0.01:
-            debtors.pop(0)
-        if creditors[0][1] < 0.01:
-            creditors.pop(0)
+        if debtors[i][1] < 0.01:
+            i += 1
+        if creditors[j][1] < 0.01:
+            j += 1
 
     return settlements
 
 
-def generate_report(member_to_family, stays, expenses, family_nights, family_payments, total_expenses, balances, settlements):
+def generate_report(expenses, total_expenses, totals_by_type, family_stays, family_stay_subtotals,
+                    balance_rows, settlements):
     """Generate text report."""
     lines = []
 
-    lines.append("=" * 50)
-    lines.append("EXPENSE SUMMARY")
-    lines.append("=" * 50)
+    lines.append(_HDR_EXPENSE_SUMMARY)
 
-    totals_by_type = calculate_expense_totals_by_type(expenses)
     for expense_type, amount in sorted(totals_by_type.items()):
         lines.append(f"  {expense_type.capitalize():20} €{amount:>10.2f}")
 
-    lines.append("-" * 50)
+    lines.append(_SEP_DASH)
     lines.append(f"  {'TOTAL':20} €{total_expenses:>10.2f}")
     lines.append("")
 
-    lines.append("=" * 50)
-    lines.append("EXPENSE DETAILS (by Family)")
-    lines.append("=" * 50)
+    lines.append(_HDR_EXPENSE_DETAILS)
 
-    # Group expenses by family
-    family_expenses = defaultdict(list)
-    for expense in expenses:
-        family_expenses[expense['paid_by_family']].append(expense)
+    # Group expenses by family (stable sort keeps entry order within a family)
+    expense_rows = sorted(zip(expenses['paid_by_family'], expenses['expense_type'],
+                              expenses['amount'], expenses['description']),
+                          key=itemgetter(0))
 
-    for family in sorted(family_expenses.keys()):
+    for family, group in groupby(expense_rows, key=itemgetter(0)):
         lines.append(f"\n  {family} Family:")
         family_total = 0
-        for exp in family_expenses[family]:
-            desc = f" - {exp['description']}" if exp['description'] else ""
-            lines.append(f"    {exp['expense_type']:15} €{exp['amount']:>10.2f}{desc}")
-            family_total += exp['amount']
+        for _, expense_type, amount, description in group:
+            desc = f" - {description}" if description else ""
+            lines.append(f"    {expense_type:15} €{amount:>10.2f}{desc}")
+            family_total += amount
         lines.append(f"    {'Subtotal':15} €{family_total:>10.2f}")
 
     lines.append("")
 
-    lines.append("=" * 50)
-    lines.append("STAY SUMMARY (Person-Nights)")
-    lines.append("=" * 50)
+    lines.append(_HDR_STAY_SUMMARY)
 
-    family_stays = defaultdict(list)
-    for stay in stays:
-        member = stay['member_name']
-        family = member_to_family[member]
-        nights = stay['nights']
-        family_stays[family].append((member, nights))
+    total_nights = sum(family_stay_subtotals.values())
 
-    total_nights = 0
-    for family in sorted(family_stays.keys()):
+    for family, members in family_stays.items():
         lines.append(f"\n  {family} Family:")
-        family_total = 0
-        for member, nights in sorted(family_stays[family]):
+        for member, nights in members:
             lines.append(f"    {member:15} {nights:3} nights")
-            family_total += nights
-        lines.append(f"    {'Subtotal':15} {family_total:3} nights")
-        total_nights += family_total
+        lines.append(f"    {'Subtotal':15} {family_stay_subtotals[family]:3} nights")
 
-    lines.append("-" * 50)
+    lines.append(_SEP_DASH)
     lines.append(f"  TOTAL PERSON-NIGHTS: {total_nights}")
     lines.append("")
 
-    lines.append("=" * 50)
-    lines.append("BALANCE SHEET")
-    lines.append("=" * 50)
+    lines.append(_HDR_BALANCE_SHEET)
 
     cost_per_night = total_expenses / total_nights
     lines.append(f"\n  Cost per person-night: €{cost_per_night:.2f}")
     lines.append("")
-    lines.append(f"  {'Family':<10} {'Nights':>8} {'Owes':>12} {'Paid':>12} {'Balance':>12}")
-    lines.append("  " + "-" * 54)
+    lines.append(_BALANCE_TABLE_HEADER)
 
-    all_families = set(family_nights.keys()) | set(family_payments.keys())
-    for family in sorted(all_families):
-        nights = family_nights.get(family, 0)
-        paid = family_payments.get(family, 0)
-        owes = nights * cost_per_night
-        balance = balances[family]
+    for family, nights, paid, owes, balance in balance_rows:
         balance_str = f"€{balance:>10.2f}" if balance >= 0 else f"-€{abs(balance):>9.2f}"
         lines.append(f"  {family:<10} {nights:>8} €{owes:>10.2f} €{paid:>10.2f} {balance_str}")
 
     lines.append("")
-    lines.append("=" * 50)
-    lines.append("SETTLEMENTS")
-    lines.append("=" * 50)
+    lines.append(_HDR_SETTLEMENTS)
 
     if not settlements:
         lines.append("\n  No settlements needed - all balanced!")
@@ -280,24 +344,18 @@ def generate_report(member_to_family, stays, expenses, family_nights, family_pay
     return "\n".join(lines)
 
 
-def generate_csv_report(member_to_family, stays, expenses, family_nights, family_payments, total_expenses, balances, settlements):
-    """Generate CSV report with multiple sections."""
-    output = io.StringIO()
+def generate_csv_report(member_to_family, stays, expenses, balance_rows, settlements):
+    """Generate CSV report with multiple sections, as UTF-8 bytes."""
+    # Write text through to a bytes buffer so the download needs no re-encoding
+    buffer = io.BytesIO()
+    output = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
 
     # Balance Sheet section
     output.write("BALANCE SHEET\n")
     writer = csv.writer(output)
     writer.writerow(["Family", "Nights", "Owes", "Paid", "Balance"])
 
-    total_nights = sum(family_nights.values())
-    cost_per_night = total_expenses / total_nights
-    all_families = set(family_nights.keys()) | set(family_payments.keys())
-
-    for family in sorted(all_families):
-        nights = family_nights.get(family, 0)
-        paid = family_payments.get(family, 0)
-        owes = nights * cost_per_night
-        balance = balances[family]
+    for family, nights, paid, owes, balance in balance_rows:
         writer.writerow([family, nights, f"{owes:.2f}", f"{paid:.2f}", f"{balance:.2f}"])
 
     output.write("\n")
@@ -316,24 +374,79 @@ def generate_csv_report(member_to_family, stays, expenses, family_nights, family
     # Expense Details section
     output.write("EXPENSE DETAILS\n")
     writer.writerow(["Family", "Type", "Amount", "Description"])
-    for expense in sorted(expenses, key=lambda x: x['paid_by_family']):
-        writer.writerow([
-            expense['paid_by_family'],
-            expense['expense_type'],
-            f"{expense['amount']:.2f}",
-            expense['description']
-        ])
+    expense_rows = zip(expenses['paid_by_family'], expenses['expense_type'],
+                       expenses['amount'], expenses['description'])
+    for family, expense_type, amount, description in sorted(expense_rows, key=itemgetter(0)):
+        writer.writerow([family, expense_type, f"{amount:.2f}", description])
 
     output.write("\n")
 
     # Stay Details section
     output.write("STAY DETAILS\n")
     writer.writerow(["Family", "Member", "Nights"])
-    stays_with_family = [(member_to_family[s['member_name']], s['member_name'], s['nights']) for s in stays]
+    stays_with_family = [(member_to_family[member], member, nights)
+                         for member, nights in zip(stays['member_name'], stays['nights'])]
     for family, member, nights in sorted(stays_with_family):
         writer.writerow([family, member, nights])
 
-    return output.getvalue()
+    output.detach()
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def compute_all(families_text: str, stays_text: str, expenses_text: str) -> dict:
+    """Run the full calculation pipeline and build both reports.
+
+    Cached on the raw input text, so redisplaying results is a lookup.
+    Raises ValueError if no nights are recorded.
+    """
+    member_to_family = parse_families(families_text)
+    stays = parse_stays(stays_text)
+    expenses = parse_expenses(expenses_text)
+
+    family_nights = calculate_person_nights(stays, member_to_family)
+    family_payments = calculate_family_payments(expenses)
+    total_expenses = sum(expenses['amount'])
+    total_nights = sum(family_nights.values())
+    if total_nights == 0:
+        raise ValueError("No nights recorded in Stays.")
+    cost_per_night = total_expenses / total_nights
+
+    balances = {}
+    all_families = set(family_nights.keys()) | set(family_payments.keys())
+    for family in all_families:
+        nights = family_nights.get(family, 0)
+        paid = family_payments.get(family, 0)
+        owes = nights * cost_per_night
+        balances[family] = paid - owes
+
+    settlements = calculate_settlements(balances)
+    # (family, nights, paid, owes, balance) rows shared by the UI and both reports
+    balance_rows = [
+        (family, family_nights.get(family, 0), family_payments.get(family, 0),
+         family_nights.get(family, 0) * cost_per_night, balances[family])
+        for family in sorted(all_families)
+    ]
+    family_stays = group_stays_by_family(stays, member_to_family)
+    family_stay_subtotals = {family: sum(n for _, n in members) for family, members in family_stays.items()}
+    totals_by_type = calculate_expense_totals_by_type(expenses)
+
+    txt_report = generate_report(expenses, total_expenses, totals_by_type, family_stays,
+                                 family_stay_subtotals, balance_rows, settlements)
+    csv_report = generate_csv_report(member_to_family, stays, expenses, balance_rows, settlements)
+
+    return {
+        'total_expenses': total_expenses,
+        'total_nights': total_nights,
+        'cost_per_night': cost_per_night,
+        'settlements': settlements,
+        'balance_rows': balance_rows,
+        'family_stays': family_stays,
+        'family_stay_subtotals': family_stay_subtotals,
+        'totals_by_type': totals_by_type,
+        'txt_report': txt_report,
+        'csv_report': csv_report,
+    }
 
 
 # Streamlit App
@@ -344,9 +457,9 @@ st.write("Calculate fair expense splits based on person-nights stayed.")
 
 # Load saved data or use defaults
 saved = load_saved_data()
-default_families = saved.get('families', "Adams:John,Mary,Tom\nOiler:Bob,Sue\nBaker:Ann")
-default_stays = saved.get('stays', "John,7\nMary,5\nTom,5\nBob,7\nSue,3\nAnn,7")
-default_expenses = saved.get('expenses', "Adams,rent,2100,House rental\nOiler,firewood,150,Firewood\nBaker,food,320,Groceries")
+default_families = saved.get('families', DEFAULT_FAMILIES)
+default_stays = saved.get('stays', DEFAULT_STAYS)
+default_expenses = saved.get('expenses', DEFAULT_EXPENSES)
 
 col1, col2 = st.columns(2)
 
@@ -404,13 +517,10 @@ if calculate_clicked:
 
             # Validate members in stays
             known_members = set(member_to_family.keys())
-            unknown_members = []
-            for stay in stays:
-                if stay['member_name'] not in known_members:
-                    unknown_members.append(stay['member_name'])
+            unknown_members = set(stays['member_name']) - known_members
 
             if unknown_members:
-                st.error(f"Unknown member(s) in Stays: {', '.join(unknown_members)}")
+                st.error(f"Unknown member(s) in Stays: {', '.join(sorted(unknown_members))}")
                 st.write("Please add these members to the Families data.")
                 if 'results' in st.session_state:
                     del st.session_state['results']
@@ -418,33 +528,23 @@ if calculate_clicked:
 
             # Validate families in expenses
             known_families = set(member_to_family.values())
-            unknown_families = []
-            for expense in expenses:
-                if expense['paid_by_family'] not in known_families:
-                    unknown_families.append(expense['paid_by_family'])
+            unknown_families = set(expenses['paid_by_family']) - known_families
 
             if unknown_families:
-                st.error(f"Unknown family/families in Expenses: {', '.join(set(unknown_families))}")
+                st.error(f"Unknown family/families in Expenses: {', '.join(sorted(unknown_families))}")
                 st.write("Please add these families to the Families data.")
                 if 'results' in st.session_state:
                     del st.session_state['results']
                 st.stop()
 
-            family_nights = calculate_person_nights(stays, member_to_family)
-            family_payments = calculate_family_payments(expenses)
-            total_expenses = sum(e['amount'] for e in expenses)
-            total_nights = sum(family_nights.values())
-            cost_per_night = total_expenses / total_nights
-
-            balances = {}
-            all_families = set(family_nights.keys()) | set(family_payments.keys())
-            for family in all_families:
-                nights = family_nights.get(family, 0)
-                paid = family_payments.get(family, 0)
-                owes = nights * cost_per_night
-                balances[family] = paid - owes
+            if sum(stays['nights']) == 0:
+                st.error("No nights recorded in Stays.")
+                st.write("Please add at least one night to calculate a split.")
+                if 'results' in st.session_state:
+                    del st.session_state['results']
+                st.stop()
 
-            settlements = calculate_settlements(balances)
+            results = compute_all(families_data, stays_data, expenses_data)
 
             # Save data to Google Sheets
             save_data(families_data, stays_data, expenses_data)
@@ -457,39 +557,28 @@ if calculate_clicked:
             }
 
             # Store results in session state
-            st.session_state['results'] = {
-                'member_to_family': member_to_family,
-                'stays': stays,
-                'expenses': expenses,
-                'family_nights': family_nights,
-                'family_payments': family_payments,
-                'total_expenses': total_expenses,
-                'total_nights': total_nights,
-                'cost_per_night': cost_per_night,
-                'balances': balances,
-                'settlements': settlements,
-                'all_families': all_families,
-            }
+            st.session_state['results'] = results
         except Exception as e:
             st.error(f"Error processing data: {e}")
             st.write("Please check your data format and try again.")
             if 'results' in st.session_state:
                 del st.session_state['results']
 
+report_save_status()
+
 # Display results if available
 if 'results' in st.session_state:
     r = st.session_state['results']
-    member_to_family = r['member_to_family']
-    stays = r['stays']
-    expenses = r['expenses']
-    family_nights = r['family_nights']
-    family_payments = r['family_payments']
     total_expenses = r['total_expenses']
     total_nights = r['total_nights']
     cost_per_night = r['cost_per_night']
-    balances = r['balances']
     settlements = r['settlements']
-    all_families = r['all_families']
+    balance_rows = r['balance_rows']
+    family_stays = r['family_stays']
+    family_stay_subtotals = r['family_stay_subtotals']
+    totals_by_type = r['totals_by_type']
+    report = r['txt_report']
+    csv_report = r['csv_report']
 
     st.divider()
 
@@ -514,11 +603,7 @@ if 'results' in st.session_state:
     # Detailed breakdown in expanders
     with st.expander("📊 Balance Sheet"):
         balance_data = []
-        for family in sorted(all_families):
-            nights = family_nights.get(family, 0)
-            paid = family_payments.get(family, 0)
-            owes = nights * cost_per_night
-            balance = balances[family]
+        for family, nights, paid, owes, balance in balance_rows:
             balance_data.append({
                 "Family": family,
                 "Nights": nights,
@@ -529,29 +614,18 @@ if 'results' in st.session_state:
         st.table(balance_data)
 
     with st.expander("🛏️ Stays by Family"):
-        family_stays = defaultdict(list)
-        for stay in stays:
-            member = stay['member_name']
-            family = member_to_family[member]
-            family_stays[family].append((member, stay['nights']))
-
-        for family in sorted(family_stays.keys()):
+        for family, members in family_stays.items():
             st.write(f"**{family} Family**")
-            for member, nights in sorted(family_stays[family]):
+            for member, nights in members:
                 st.write(f"  - {member}: {nights} nights")
-            st.write(f"  - *Subtotal: {sum(n for _, n in family_stays[family])} nights*")
+            st.write(f"  - *Subtotal: {family_stay_subtotals[family]} nights*")
 
     with st.expander("💰 Expenses by Category"):
-        totals_by_type = calculate_expense_totals_by_type(expenses)
         for expense_type, amount in sorted(totals_by_type.items()):
             st.write(f"- {expense_type.capitalize()}: €{amount:,.2f}")
 
     # Download reports
     st.divider()
-    report = generate_report(member_to_family, stays, expenses, family_nights,
-                             family_payments, total_expenses, balances, settlements)
-    csv_report = generate_csv_report(member_to_family, stays, expenses, family_nights,
-                                     family_payments, total_expenses, balances, settlements)
 
     col1, col2 = st.columns(2)
     with col1: